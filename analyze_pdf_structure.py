@@ -3,32 +3,128 @@
 Analyze the actual HMC PDF structure to identify all subchapters, articles, and sections
 """
 
+import os
 import re
-import pdfplumber
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+import orjson
+import pypdfium2 as pdfium
+
+class StructEntry(NamedTuple):
+    """A structural element found in the PDF"""
+    number: str
+    title: str
+    page: int
+
+# Patterns for different structural elements
+_STRUCTURE_PATTERNS = {
+    'subchapter': [
+        re.compile(r'SUBCHAPTER\s+(\d+|[IVX]+)\s*[-–—]\s*(.+?)(?=\n|$)', re.IGNORECASE),
+        re.compile(r'SUB-CHAPTER\s+(\d+|[IVX]+)\s*[-–—]\s*(.+?)(?=\n|$)', re.IGNORECASE),
+        re.compile(r'SUBCHAPTER\s+(\d+|[IVX]+)\s*[.:]?\s*(.+?)(?=\n|$)', re.IGNORECASE),
+    ],
+    'article': [
+        re.compile(r'ARTICLE\s+(\d+|[IVX]+|[A-Z]+)\s*[-–—]\s*(.+?)(?=\n|$)', re.IGNORECASE),
+        re.compile(r'ARTICLE\s+(\d+|[IVX]+|[A-Z]+)\s*[.:]?\s*(.+?)(?=\n|$)', re.IGNORECASE),
+    ],
+    'section': [
+        re.compile(r'§\s*27-(\d{4})\s*[-–—]?\s*(.+?)(?=\n|$)', re.IGNORECASE),
+        re.compile(r'Section\s+27-(\d{4})\s*[-–—]?\s*(.+?)(?=\n|$)', re.IGNORECASE),
+        re.compile(r'27-(\d{4})\s*[-–—]\s*(.+?)(?=\n|$)', re.IGNORECASE),
+    ]
+}
+
+def _fuse_structure_patterns(patterns):
+    """
+    Fuse the per-category pattern lists into one multiline regex.
+    Each category becomes an optional lookahead from the start of a line, so a
+    single match reports every category found on that line, and within a
+    category the first pattern in list order still wins.
+    Returns the regex and, per category, the (number, title) group indices.
+    """
+    lookaheads = []
+    groups = {}
+    group_count = 0
+    for category, category_patterns in patterns.items():
+        alternatives = []
+        groups[category] = []
+        for pattern in category_patterns:
+            # Keep \s from running past the end of the line
+            alternatives.append(r'[^\n]*?' + pattern.pattern.replace(r'\s', r'[^\S\n]'))
+            groups[category].append((group_count + 1, group_count + 2))
+            group_count += pattern.groups
+        lookaheads.append('(?:(?=' + '|'.join(alternatives) + '))?')
+    
+    # Only lines mentioning one of the structural keywords produce a match at all
+    fused = re.compile(r'^(?=[^\n]*?(?:SUB-?CHAPTER|ARTICLE|27-\d{4}))' + ''.join(lookaheads),
+                       re.IGNORECASE | re.MULTILINE)
+    return fused, groups
+
+_FUSED_STRUCTURE_RE, _STRUCTURE_GROUPS = _fuse_structure_patterns(_STRUCTURE_PATTERNS)
+
+def _first_hit(match, category, page_num):
+    """Return a StructEntry for the first pattern of a category that hit, if any"""
+    for number_group, title_group in _STRUCTURE_GROUPS[category]:
+        number = match.group(number_group)
+        if number is not None:
+            title = match.group(title_group)
+            # Numbers and titles repeat a lot across pages (prose hits especially)
+            return StructEntry(sys.intern(number), sys.intern(title.strip() if title else ""), page_num)
+    return None
+
+_TOC_PATTERNS = [
+    re.compile(r'table\s+of\s+contents', re.IGNORECASE),
+    re.compile(r'contents', re.IGNORECASE),
+    re.compile(r'index', re.IGNORECASE),
+]
+
+# Per-process PDF handle, opened once by each pool worker
+_worker_pdf = None
+
+def _read_page_text(pdf, page_idx):
+    """Extract the text of one page with PDFium"""
+    page = pdf[page_idx]
+    textpage = page.get_textpage()
+    text = textpage.get_text_range()
+    textpage.close()
+    page.close()
+    # PDFium ends lines with '\r\n' and keeps trailing spaces; normalize to plain lines
+    return '\n'.join(line.rstrip() for line in text.splitlines())
+
+def _init_worker(pdf_path):
+    """Open the PDF once per worker process"""
+    global _worker_pdf
+    _worker_pdf = pdfium.PdfDocument(pdf_path)
+
+def _extract_page_text(page_idx):
+    """Extract the text of a single page (runs in a worker process)"""
+    return page_idx, _read_page_text(_worker_pdf, page_idx)
+
+def extract_page_texts(pdf_path, page_numbers=None):
+    """
+    Extract page text across a process pool.
+    Returns (page_num, text) pairs in request order; all pages if page_numbers is None.
+    """
+    # PdfDocument is only a context manager from pypdfium2 5.0 on
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        total_pages = len(pdf)
+    finally:
+        pdf.close()
+    
+    if page_numbers is None:
+        page_numbers = range(1, total_pages + 1)
+    page_indices = [page_num - 1 for page_num in page_numbers if 1 <= page_num <= total_pages]
+    
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker, initargs=(pdf_path,)) as executor:
+        return [(page_idx + 1, text) for page_idx, text in executor.map(_extract_page_text, page_indices, chunksize=8)]
 
 def analyze_pdf_structure(pdf_path):
     """Analyze the PDF to find all structural elements"""
     
     print("📖 Analyzing PDF structure...")
     
-    # Patterns for different structural elements
-    patterns = {
-        'subchapter': [
-            re.compile(r'SUBCHAPTER\s+(\d+|[IVX]+)\s*[-–—]\s*(.+?)(?=\n|$)', re.IGNORECASE),
-            re.compile(r'SUB-CHAPTER\s+(\d+|[IVX]+)\s*[-–—]\s*(.+?)(?=\n|$)', re.IGNORECASE),
-            re.compile(r'SUBCHAPTER\s+(\d+|[IVX]+)\s*[.:]?\s*(.+?)(?=\n|$)', re.IGNORECASE),
-        ],
-        'article': [
-            re.compile(r'ARTICLE\s+(\d+|[IVX]+|[A-Z]+)\s*[-–—]\s*(.+?)(?=\n|$)', re.IGNORECASE),
-            re.compile(r'ARTICLE\s+(\d+|[IVX]+|[A-Z]+)\s*[.:]?\s*(.+?)(?=\n|$)', re.IGNORECASE),
-        ],
-        'section': [
-            re.compile(r'§\s*27-(\d{4})\s*[-–—]?\s*(.+?)(?=\n|$)', re.IGNORECASE),
-            re.compile(r'Section\s+27-(\d{4})\s*[-–—]?\s*(.+?)(?=\n|$)', re.IGNORECASE),
-            re.compile(r'27-(\d{4})\s*[-–—]\s*(.+?)(?=\n|$)', re.IGNORECASE),
-        ]
-    }
-    
     structure = {
         'subchapters': [],
         'articles': [],
@@ -36,66 +132,41 @@ def analyze_pdf_structure(pdf_path):
         'total_pages': 0
     }
     
-    with pdfplumber.open(pdf_path) as pdf:
-        structure['total_pages'] = len(pdf.pages)
+    page_texts = extract_page_texts(pdf_path)
+    structure['total_pages'] = len(page_texts)
+    
+    for page_num, text in page_texts:
+        if not text:
+            continue
         
-        for page_num, page in enumerate(pdf.pages, 1):
-            text = page.extract_text()
-            if not text:
-                continue
-                
-            lines = text.split('\n')
+        # Skip pages without any structural keyword before running the regex
+        upper = text.upper()
+        if 'SUBCHAPTER' not in upper and 'SUB-CHAPTER' not in upper and 'ARTICLE' not in upper and '27-' not in text:
+            continue
+            
+        # One regex walk per page; each match is a line with at least one hit
+        for match in _FUSED_STRUCTURE_RE.finditer(text):
+            # Check for subchapters
+            entry = _first_hit(match, 'subchapter', page_num)
+            if entry:
+                structure['subchapters'].append(entry)
+                print(f"📚 Found Subchapter {entry.number}: {entry.title[:50]}... (page {page_num})")
+            
+            # Check for articles
+            entry = _first_hit(match, 'article', page_num)
+            if entry:
+                structure['articles'].append(entry)
+                print(f"📖 Found Article {entry.number}: {entry.title[:50]}... (page {page_num})")
             
-            for line_num, line in enumerate(lines):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Check for subchapters
-                for pattern in patterns['subchapter']:
-                    match = pattern.search(line)
-                    if match:
-                        structure['subchapters'].append({
-                            'number': match.group(1),
-                            'title': match.group(2).strip(),
-                            'page': page_num,
-                            'line': line,
-                            'full_match': match.group(0)
-                        })
-                        print(f"📚 Found Subchapter {match.group(1)}: {match.group(2).strip()[:50]}... (page {page_num})")
-                        break
-                
-                # Check for articles
-                for pattern in patterns['article']:
-                    match = pattern.search(line)
-                    if match:
-                        structure['articles'].append({
-                            'number': match.group(1),
-                            'title': match.group(2).strip(),
-                            'page': page_num,
-                            'line': line,
-                            'full_match': match.group(0)
-                        })
-                        print(f"📖 Found Article {match.group(1)}: {match.group(2).strip()[:50]}... (page {page_num})")
-                        break
-                
-                # Check for sections
-                for pattern in patterns['section']:
-                    match = pattern.search(line)
-                    if match:
-                        structure['sections'].append({
-                            'number': match.group(1),
-                            'title': match.group(2).strip() if match.group(2) else "",
-                            'page': page_num,
-                            'line': line,
-                            'full_match': match.group(0)
-                        })
-                        break
+            # Check for sections
+            entry = _first_hit(match, 'section', page_num)
+            if entry:
+                structure['sections'].append(entry)
     
     return structure
 
 def print_structure_summary(structure):
-    """Print a summary of the found structure"""
+    """Print a summary of the found structure (one write per listing)"""
     print(f"\n📊 STRUCTURE ANALYSIS SUMMARY")
     print("=" * 50)
     print(f"Total pages: {structure['total_pages']}")
@@ -105,20 +176,20 @@ def print_structure_summary(structure):
     
     if structure['subchapters']:
         print(f"\n📚 SUBCHAPTERS ({len(structure['subchapters'])} found):")
-        for i, sub in enumerate(structure['subchapters'], 1):
-            print(f"  {i}. Subchapter {sub['number']}: {sub['title'][:60]}... (page {sub['page']})")
+        print('\n'.join(f"  {i}. Subchapter {sub.number}: {sub.title[:60]}... (page {sub.page})"
+                        for i, sub in enumerate(structure['subchapters'], 1)))
     
     if structure['articles']:
         print(f"\n📖 ARTICLES ({len(structure['articles'])} found):")
-        for i, art in enumerate(structure['articles'][:10], 1):  # Show first 10
-            print(f"  {i}. Article {art['number']}: {art['title'][:60]}... (page {art['page']})")
+        print('\n'.join(f"  {i}. Article {art.number}: {art.title[:60]}... (page {art.page})"
+                        for i, art in enumerate(structure['articles'][:10], 1)))  # Show first 10
         if len(structure['articles']) > 10:
             print(f"  ... and {len(structure['articles']) - 10} more articles")
     
     if structure['sections']:
         print(f"\n📝 SECTIONS ({len(structure['sections'])} found):")
-        for i, sec in enumerate(structure['sections'][:15], 1):  # Show first 15
-            print(f"  {i}. § 27-{sec['number']}: {sec['title'][:50]}... (page {sec['page']})")
+        print('\n'.join(f"  {i}. § 27-{sec.number}: {sec.title[:50]}... (page {sec.page})"
+                        for i, sec in enumerate(structure['sections'][:15], 1)))  # Show first 15
         if len(structure['sections']) > 15:
             print(f"  ... and {len(structure['sections']) - 15} more sections")
 
@@ -126,19 +197,14 @@ def find_table_of_contents(pdf_path):
     """Try to find and extract table of contents"""
     print("\n🔍 Looking for Table of Contents...")
     
-    toc_patterns = [
-        re.compile(r'table\s+of\s+contents', re.IGNORECASE),
-        re.compile(r'contents', re.IGNORECASE),
-        re.compile(r'index', re.IGNORECASE),
-    ]
-    
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages[:10], 1):  # Check first 10 pages
-            text = page.extract_text()
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        for page_num in range(1, min(len(pdf), 10) + 1):  # Check first 10 pages
+            text = _read_page_text(pdf, page_num - 1)
             if not text:
                 continue
             
-            for pattern in toc_patterns:
+            for pattern in _TOC_PATTERNS:
                 if pattern.search(text):
                     print(f"📋 Possible TOC found on page {page_num}")
                     lines = text.split('\n')[:20]  # Show first 20 lines
@@ -146,6 +212,8 @@ def find_table_of_contents(pdf_path):
                         if line.strip():
                             print(f"    {line.strip()}")
                     return page_num
+    finally:
+        pdf.close()
     
     print("❌ No clear table of contents found")
     return None
@@ -163,8 +231,7 @@ if __name__ == "__main__":
     print_structure_summary(structure)
     
     # Save detailed results
-    import json
-    with open('pdf_structure_analysis.json', 'w') as f:
-        json.dump(structure, f, indent=2)
+    with open('pdf_structure_analysis.json', 'wb') as f:
+        f.write(orjson.dumps(structure, default=StructEntry._asdict, option=orjson.OPT_INDENT_2))
     
     print(f"\n💾 Detailed analysis saved to 'pdf_structure_analysis.json'")
\ No newline at end of file
@@ -4,11 +4,44 @@ NYC Housing Maintenance Code Chatbot Integration Example
 Demonstrates how to use the chunked HMC data with an LLM for answering housing law questions.
 """
 
-import json
+import copy
+import heapq
 import os
 from typing import List, Dict, Any, Tuple
 from dataclasses import dataclass
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 import re
+import orjson
+
+_WORD_RE = re.compile(r'\b\w+\b')
+_SECTION_RE = re.compile(r'27-(\d{4})')
+
+# ASCII non-word characters (anything \w doesn't match) mapped to spaces
+_NONWORD_TABLE = str.maketrans({c: ' ' for c in map(chr, range(128)) if not (c.isalnum() or c == '_')})
+
+def _tokens(text: str) -> List[str]:
+    """Lowercase word tokens, equivalent to _WORD_RE.findall(text.lower())"""
+    text = text.lower()
+    if text.isascii():
+        return text.translate(_NONWORD_TABLE).split()
+    return _WORD_RE.findall(text)
+
+# Answer templates keyed by topic terms, checked in order as substrings of the
+# lowercased question (so plurals like "owners" or "violations" still match)
+_TOPIC_TEMPLATES: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (('owner',), "According to {title}, the Housing Maintenance Code defines owner responsibilities and requirements. The specific regulations can be found in the referenced section, which covers legal obligations for property owners in NYC."),
+    (('tenant',), "Based on {title}, tenant rights and protections are outlined in the Housing Maintenance Code. This section addresses tenant-related provisions and may reference additional sections for comprehensive coverage."),
+    (('heat',), "Heating requirements are covered under {title}. The Housing Maintenance Code establishes minimum heating standards that property owners must maintain for tenant safety and comfort."),  # also matches "heating"
+    (('violation',), "Housing violations are addressed in {title}. The code outlines specific violations, enforcement procedures, and penalties for non-compliance with housing standards."),
+)
+_DEFAULT_TEMPLATE = "The most relevant information is found in {title}. This section of the Housing Maintenance Code addresses your query and may contain specific requirements, definitions, or procedures related to your question."
+
+def _read_json(path: str) -> Any:
+    """Read and parse a JSON file"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
 
 @dataclass
 class QueryResult:
@@ -24,102 +57,207 @@ class QueryResult:
 class HMCChatbot:
     """Chatbot for NYC Housing Maintenance Code queries"""
     
+    # Bump when the cached attributes or their layout change
+    INDEX_CACHE_VERSION = 4
+    INDEX_CACHE_ATTRS = ('chunks', 'cross_references', '_chunk_order',
+                         '_title_index', '_keyword_index', '_keyword_substring_index',
+                         '_section_index', '_reverse_cross_refs')
+    
+    ANSWER_CACHE_SIZE = 1024
+    
     def __init__(self, chunks_dir: str = "chunks"):
         self.chunks_dir = chunks_dir
         self.chunks = {}
         self.cross_references = {}
+        self._chunk_order: Dict[str, int] = {}
+        self._title_index: Dict[str, List[str]] = {}
+        self._keyword_index: Dict[str, List[str]] = {}
+        self._keyword_substring_index: Dict[str, List[str]] = {}
+        self._section_index: Dict[str, str] = {}
+        self._reverse_cross_refs: Dict[str, List[str]] = {}
+        self._answer_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.load_chunks()
     
     def load_chunks(self):
         """Load all chunks and metadata"""
         print("📚 Loading HMC knowledge base...")
+        self._answer_cache.clear()
         
-        # Load chunks from all categories
+        # Collect chunk files from all categories
+        chunk_paths = []
         for chunk_type in ['sections', 'articles', 'subchapters']:
             chunk_dir = os.path.join(self.chunks_dir, chunk_type)
             if os.path.exists(chunk_dir):
-                for filename in os.listdir(chunk_dir):
-                    if filename.endswith('.json'):
-                        filepath = os.path.join(chunk_dir, filename)
-                        with open(filepath, 'r') as f:
-                            chunk_data = json.load(f)
-                            self.chunks[chunk_data['chunk_id']] = chunk_data
+                with os.scandir(chunk_dir) as entries:
+                    # DirEntry carries the file type from the directory read, so is_file() needs no stat
+                    chunk_paths.extend(entry.path for entry in entries
+                                       if entry.name.endswith('.json') and entry.is_file())
         
-        # Load cross-references
         cross_ref_path = os.path.join(self.chunks_dir, 'metadata', 'cross_references.json')
+        json_paths = chunk_paths + ([cross_ref_path] if os.path.exists(cross_ref_path) else [])
+        
+        # Reuse the cached index while no source file has been added, removed or
+        # modified. A list, since that is what the key reads back as from JSON.
+        cache_key = [self.INDEX_CACHE_VERSION, json_paths,
+                     max((os.stat(path).st_mtime for path in json_paths), default=0)]
+        if self._load_index_cache(cache_key):
+            print(f"✅ Loaded {len(self.chunks)} chunks (cached index)")
+            return
+        
+        # Parse files concurrently; map() keeps results in file order
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            for chunk_data in executor.map(_read_json, chunk_paths):
+                self.chunks[chunk_data['chunk_id']] = chunk_data
+        
+        # Load cross-references
         if os.path.exists(cross_ref_path):
-            with open(cross_ref_path, 'r') as f:
-                self.cross_references = json.load(f)
+            self.cross_references = _read_json(cross_ref_path)
+        
+        self.build_indexes()
+        self._save_index_cache(cache_key)
         
         print(f"✅ Loaded {len(self.chunks)} chunks")
     
-    def simple_keyword_search(self, query: str, top_k: int = 5) -> List[QueryResult]:
-        """
-        Simple keyword-based search (can be enhanced with semantic search)
-        """
-        query_lower = query.lower()
-        query_words = set(re.findall(r'\b\w+\b', query_lower))
+    def _index_cache_path(self) -> str:
+        return os.path.join(self.chunks_dir, '.index.json')
+    
+    def _load_index_cache(self, cache_key: List) -> bool:
+        """Restore chunks and indexes from the JSON cache if it matches cache_key"""
+        try:
+            cached = _read_json(self._index_cache_path())
+        except (OSError, orjson.JSONDecodeError):
+            return False
         
-        results = []
+        if not isinstance(cached, dict) or cached.get('key') != cache_key:
+            return False
+        if not all(attr in cached for attr in self.INDEX_CACHE_ATTRS):
+            return False
+        
+        for attr in self.INDEX_CACHE_ATTRS:
+            setattr(self, attr, cached[attr])
+        return True
+    
+    def _save_index_cache(self, cache_key: List):
+        """Write chunks and indexes as JSON; a failed write only costs the next startup"""
+        cached = {attr: getattr(self, attr) for attr in self.INDEX_CACHE_ATTRS}
+        cached['key'] = cache_key
+        
+        cache_path = self._index_cache_path()
+        tmp_path = f"{cache_path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(cached))
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    
+    def build_indexes(self):
+        """Build inverted indexes over chunk titles, keywords, sections and cross-references"""
+        self._chunk_order = {chunk_id: i for i, chunk_id in enumerate(self.chunks)}
+        self._title_index = {}
+        self._keyword_index = {}
+        self._section_index = {}
         
         for chunk_id, chunk_data in self.chunks.items():
-            # Calculate relevance score based on keyword matches
-            score = 0
-            
-            # Check title matches (higher weight)
-            title_words = set(re.findall(r'\b\w+\b', chunk_data['title'].lower()))
-            title_matches = len(query_words.intersection(title_words))
-            score += title_matches * 3
+            for word in set(_tokens(chunk_data['title'])):
+                self._title_index.setdefault(word, []).append(chunk_id)
             
-            # Check keyword matches
-            chunk_keywords = [kw.lower() for kw in chunk_data.get('keywords', [])]
-            for keyword in chunk_keywords:
-                if any(word in keyword for word in query_words):
-                    score += 2
+            for keyword in chunk_data.get('keywords', []):
+                self._keyword_index.setdefault(keyword.lower(), []).append(chunk_id)
             
-            # Check if this is a section reference (e.g., "27-2004")
-            section_pattern = r'27-(\d{4})'
-            section_matches = re.findall(section_pattern, query)
-            if section_matches:
-                chunk_section = chunk_data.get('hierarchy', {}).get('section', '')
-                if any(f"27-{match}" == chunk_section for match in section_matches):
-                    score += 10  # High relevance for direct section matches
-            
-            if score > 0:
-                results.append(QueryResult(
-                    chunk_id=chunk_id,
-                    title=chunk_data['title'],
-                    content=f"[Content would be extracted from PDF - {chunk_data['content_length']} chars]",
-                    relevance_score=score,
-                    chunk_type=chunk_data['chunk_type'],
-                    cross_references=chunk_data.get('cross_references', []),
-                    keywords=chunk_data.get('keywords', [])
-                ))
-        
-        # Sort by relevance score and return top results
-        results.sort(key=lambda x: x.relevance_score, reverse=True)
-        return results[:top_k]
-    
-    def get_related_sections(self, section_num: str) -> List[str]:
-        """Get sections that reference the given section"""
-        related = []
+            chunk_section = chunk_data.get('hierarchy', {}).get('section')
+            if chunk_section:
+                self._section_index[chunk_section] = chunk_id
         
-        # Direct cross-references
-        if section_num in self.cross_references:
-            related.extend(self.cross_references[section_num])
+        # Keywords match when a query word is a substring of them. Query words are
+        # runs of word characters, so indexing every substring of each keyword's
+        # word runs finds all keywords containing a given word in one lookup.
+        self._keyword_substring_index = {}
+        for keyword in self._keyword_index:
+            substrings = {
+                word[start:end]
+                for word in _tokens(keyword)
+                for start in range(len(word))
+                for end in range(start + 1, len(word) + 1)
+            }
+            for substring in substrings:
+                self._keyword_substring_index.setdefault(substring, []).append(keyword)
         
-        # Reverse lookup - sections that reference this one
+        # Sections that reference each section
+        self._reverse_cross_refs = {}
         for ref_section, targets in self.cross_references.items():
-            if section_num in targets:
-                related.append(ref_section)
+            for target in targets:
+                self._reverse_cross_refs.setdefault(target, []).append(ref_section)
+    
+    def simple_keyword_search(self, query: str, top_k: int = 5) -> List[QueryResult]:
+        """
+        Simple keyword-based search (can be enhanced with semantic search)
+        """
+        query_words = set(_tokens(query))
+        
+        # Section references in the query (e.g., "27-2004") don't depend on the chunk
+        query_sections = {f"27-{match}" for match in _SECTION_RE.findall(query)}
+        
+        # Check title matches (higher weight)
+        title_hits = Counter(chain.from_iterable(self._title_index.get(word, ()) for word in query_words))
+        scores = Counter({chunk_id: hits * 3 for chunk_id, hits in title_hits.items()})
+        
+        # Check keyword matches (keywords containing any query word)
+        matched_keywords = set(chain.from_iterable(self._keyword_substring_index.get(word, ()) for word in query_words))
+        for keyword in matched_keywords:
+            for chunk_id in self._keyword_index[keyword]:
+                scores[chunk_id] += 2
         
-        return list(set(related))
+        # Check if this is a section reference
+        for section in query_sections:
+            chunk_id = self._section_index.get(section)
+            if chunk_id is not None:
+                scores[chunk_id] += 10  # High relevance for direct section matches
+        
+        # Only chunks sharing something with the query are scored; keep load order for ties
+        results = []
+        for chunk_id in sorted(scores, key=self._chunk_order.__getitem__):
+            chunk_data = self.chunks[chunk_id]
+            results.append(QueryResult(
+                chunk_id=chunk_id,
+                title=chunk_data['title'],
+                content=f"[Content would be extracted from PDF - {chunk_data['content_length']} chars]",
+                relevance_score=scores[chunk_id],
+                chunk_type=chunk_data['chunk_type'],
+                cross_references=chunk_data.get('cross_references', []),
+                keywords=chunk_data.get('keywords', [])
+            ))
+        
+        # Return the top results by relevance score
+        return heapq.nlargest(top_k, results, key=lambda x: x.relevance_score)
+    
+    def get_related_sections(self, section_num: str) -> List[str]:
+        """Get sections referenced by, or referencing, the given section"""
+        return list(set(self.cross_references.get(section_num, ())) | set(self._reverse_cross_refs.get(section_num, ())))
     
     def answer_question(self, question: str) -> Dict[str, Any]:
         """
         Main method to answer housing law questions
+        (repeated questions are served from an LRU cache; each call gets its own copy)
         """
         print(f"\n❓ Question: {question}")
+        
+        # Case and spacing don't affect the answer; punctuation does (e.g. "27-2004")
+        cache_key = ' '.join(question.lower().split())
+        response = self._answer_cache.get(cache_key)
+        if response is not None:
+            self._answer_cache.move_to_end(cache_key)
+            return copy.deepcopy(response)
+        
+        response = self._answer_question(question)
+        self._answer_cache[cache_key] = response
+        if len(self._answer_cache) > self.ANSWER_CACHE_SIZE:
+            self._answer_cache.popitem(last=False)
+        # The cached response (and the chunk data it references) stays private
+        return copy.deepcopy(response)
+    
+    def _answer_question(self, question: str) -> Dict[str, Any]:
+        """Search the knowledge base and build the response for answer_question"""
         print("🔍 Searching HMC knowledge base...")
         
         # Search for relevant chunks
@@ -136,7 +274,7 @@ class HMCChatbot:
         primary_result = results[0]
         
         # Find related sections for additional context
-        section_match = re.search(r'27-(\d{4})', primary_result.chunk_id)
+        section_match = _SECTION_RE.search(primary_result.chunk_id)
         related_sections = []
         if section_match:
             section_num = section_match.group(1)
@@ -169,23 +307,14 @@ class HMCChatbot:
             return "No relevant information found."
         
         primary = results[0]
+        question_lower = question.lower()
         
-        # Basic answer construction based on chunk type and keywords
-        if 'owner' in question.lower():
-            if 'definition' in primary.keywords or 'owner' in primary.keywords:
-                return f"According to {primary.title}, the Housing Maintenance Code defines owner responsibilities and requirements. The specific regulations can be found in the referenced section, which covers legal obligations for property owners in NYC."
-        
-        elif 'tenant' in question.lower():
-            return f"Based on {primary.title}, tenant rights and protections are outlined in the Housing Maintenance Code. This section addresses tenant-related provisions and may reference additional sections for comprehensive coverage."
-        
-        elif 'heat' in question.lower() or 'heating' in question.lower():
-            return f"Heating requirements are covered under {primary.title}. The Housing Maintenance Code establishes minimum heating standards that property owners must maintain for tenant safety and comfort."
-        
-        elif 'violation' in question.lower():
-            return f"Housing violations are addressed in {primary.title}. The code outlines specific violations, enforcement procedures, and penalties for non-compliance with housing standards."
+        # Basic answer construction: first topic mentioned in the question wins
+        for topic_terms, template in _TOPIC_TEMPLATES:
+            if any(term in question_lower for term in topic_terms):
+                return template.format(title=primary.title)
         
-        else:
-            return f"The most relevant information is found in {primary.title}. This section of the Housing Maintenance Code addresses your query and may contain specific requirements, definitions, or procedures related to your question."
+        return _DEFAULT_TEMPLATE.format(title=primary.title)
     
     def get_chunk_content(self, chunk_id: str) -> str:
         """
@@ -3,86 +3,92 @@
 Search for all subchapter headings in the PDF
 """
 
-import pdfplumber
 import re
+from analyze_pdf_structure import extract_page_texts
+
+# Exact subchapter heading on a line of its own ([^\S\n] keeps matches within one line)
+_SUBCHAPTER_HEADING_RE = re.compile(r'^[^\S\n]*SUBCHAPTER[^\S\n]+(\d+|[IVX]+)[^\S\n]*$', re.IGNORECASE | re.MULTILINE)
+
+# Looser patterns that might be subchapter headings
+_LIKELY_SUBCHAPTER_PATTERNS = [
+    re.compile(r'SUBCHAPTER\s+(\d+)', re.IGNORECASE),
+    re.compile(r'SUB-CHAPTER\s+(\d+)', re.IGNORECASE),
+    re.compile(r'CHAPTER\s+(\d+)', re.IGNORECASE),
+    re.compile(r'PART\s+(\d+)', re.IGNORECASE),
+]
+
+# Every likely pattern contains one of these words, so one search rules a line in or out
+_LIKELY_SUBCHAPTER_PREFILTER = re.compile(r'CHAPTER|PART', re.IGNORECASE)
 
 def find_all_subchapters(pdf_path):
     """Search through all pages for subchapter headings"""
     
-    subchapter_pattern = re.compile(r'^SUBCHAPTER\s+(\d+|[IVX]+)\s*$', re.IGNORECASE)
-    
     subchapters = []
     
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, 1):
-            text = page.extract_text()
-            if not text:
-                continue
-                
-            lines = text.split('\n')
+    for page_num, text in extract_page_texts(pdf_path):
+        if not text:
+            continue
             
-            for line_num, line in enumerate(lines):
-                line = line.strip()
-                
-                # Check for exact subchapter heading
-                match = subchapter_pattern.match(line)
-                if match:
-                    # Get the next line for the title
-                    title = ""
-                    if line_num + 1 < len(lines):
-                        title = lines[line_num + 1].strip()
-                    
-                    subchapters.append({
-                        'number': match.group(1),
-                        'title': title,
-                        'page': page_num,
-                        'line': line,
-                        'context': lines[max(0, line_num-2):line_num+5]  # Show context
-                    })
-                    
-                    print(f"📚 Found SUBCHAPTER {match.group(1)} on page {page_num}")
-                    print(f"    Title: {title}")
-                    print(f"    Context:")
-                    for i, ctx_line in enumerate(lines[max(0, line_num-2):line_num+5]):
-                        marker = ">>> " if i == min(2, line_num) else "    "
-                        print(f"    {marker}{ctx_line}")
-                    print()
+        lines = None
+        
+        # Check for exact subchapter headings across the whole page at once
+        for match in _SUBCHAPTER_HEADING_RE.finditer(text):
+            # Only pages with a heading need their lines
+            if lines is None:
+                lines = text.split('\n')
+            line_num = text.count('\n', 0, match.start())
+            line = match.group(0).strip()
+            
+            # Get the next line for the title
+            title = ""
+            if line_num + 1 < len(lines):
+                title = lines[line_num + 1].strip()
+            
+            context = lines[max(0, line_num-2):line_num+5]  # Show context
+            subchapters.append({
+                'number': match.group(1),
+                'title': title,
+                'page': page_num,
+                'line': line,
+                'context': context
+            })
+            
+            print(f"📚 Found SUBCHAPTER {match.group(1)} on page {page_num}")
+            print(f"    Title: {title}")
+            print(f"    Context:")
+            for i, ctx_line in enumerate(context):
+                marker = ">>> " if i == min(2, line_num) else "    "
+                print(f"    {marker}{ctx_line}")
+            print()
     
     return subchapters
 
 def search_for_likely_subchapters(pdf_path):
     """Search for patterns that might be subchapter headings"""
     
-    patterns = [
-        re.compile(r'SUBCHAPTER\s+(\d+)', re.IGNORECASE),
-        re.compile(r'SUB-CHAPTER\s+(\d+)', re.IGNORECASE),
-        re.compile(r'CHAPTER\s+(\d+)', re.IGNORECASE),
-        re.compile(r'PART\s+(\d+)', re.IGNORECASE),
-    ]
-    
     found_patterns = []
     
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, 1):
-            text = page.extract_text()
-            if not text:
+    for page_num, text in extract_page_texts(pdf_path):
+        if not text:
+            continue
+            
+        lines = text.split('\n')
+        
+        for line_num, line in enumerate(lines):
+            line_clean = line.strip()
+            if not _LIKELY_SUBCHAPTER_PREFILTER.search(line_clean):
                 continue
-                
-            lines = text.split('\n')
             
-            for line_num, line in enumerate(lines):
-                line_clean = line.strip()
-                
-                for pattern in patterns:
-                    matches = pattern.findall(line_clean)
-                    if matches:
-                        found_patterns.append({
-                            'pattern': pattern.pattern,
-                            'matches': matches,
-                            'page': page_num,
-                            'line': line_clean,
-                            'context': lines[max(0, line_num-1):line_num+3]
-                        })
+            for pattern in _LIKELY_SUBCHAPTER_PATTERNS:
+                matches = pattern.findall(line_clean)
+                if matches:
+                    found_patterns.append({
+                        'pattern': pattern.pattern,
+                        'matches': matches,
+                        'page': page_num,
+                        'line': line_clean,
+                        'context': lines[max(0, line_num-1):line_num+3]
+                    })
     
     return found_patterns
 
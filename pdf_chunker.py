@@ -5,14 +5,43 @@ A practical implementation for chunking the HMC PDF for LLM chatbot use.
 """
 
 import re
-import json
 import os
-from typing import List, Dict, Any, Tuple
-from dataclasses import dataclass, asdict
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+
+import orjson
+
+def _dump(obj: Any, path: str):
+    """Write obj to path as indented JSON"""
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
+# Per-process pdfplumber handle, opened once by each pool worker
+_worker_pdf = None
+
+def _init_worker(pdf_path: str):
+    """Open the PDF once per worker process"""
+    import pdfplumber
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(pdf_path)
+
+def _extract_one_page(page_index: int) -> Tuple[int, str]:
+    """Extract the text of a single page (runs in a worker process)"""
+    page = _worker_pdf.pages[page_index]
+    text = page.extract_text()
+    page.close()
+    return page_index, text
 
 @dataclass
 class ChunkMetadata:
     """Metadata for each chunk"""
+    # Declared by hand rather than with dataclass(slots=True), which needs
+    # Python 3.10; fine here since no field has a default
+    __slots__ = ('chunk_id', 'title', 'hierarchy', 'page_numbers', 'cross_references',
+                 'keywords', 'chunk_type', 'parent_chunks', 'content_length', 'token_estimate')
+    
     chunk_id: str
     title: str
     hierarchy: Dict[str, str]
@@ -23,10 +52,45 @@ class ChunkMetadata:
     parent_chunks: List[str]
     content_length: int
     token_estimate: int
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Field dict for JSON output; unlike asdict(), shares the field values instead of copying them"""
+        return {
+            'chunk_id': self.chunk_id,
+            'title': self.title,
+            'hierarchy': self.hierarchy,
+            'page_numbers': self.page_numbers,
+            'cross_references': self.cross_references,
+            'keywords': self.keywords,
+            'chunk_type': self.chunk_type,
+            'parent_chunks': self.parent_chunks,
+            'content_length': self.content_length,
+            'token_estimate': self.token_estimate
+        }
 
 class HMCChunker:
     """Main class for chunking the NYC Housing Maintenance Code PDF"""
     
+    # Common HMC terms and concepts
+    HMC_TERMS = (
+        'dwelling', 'owner', 'tenant', 'occupant', 'building', 'premises',
+        'violation', 'inspection', 'maintenance', 'repair', 'habitability',
+        'safety', 'health', 'sanitary', 'ventilation', 'heat', 'hot water',
+        'pest', 'rodent', 'lead', 'mold', 'fire', 'emergency', 'access',
+        'common area', 'apartment', 'room', 'bathroom', 'kitchen'
+    )
+    
+    # Extraction strategy by page count, checked in order:
+    # (max pages or None for any size, method, extract pages in a process pool)
+    EXTRACTION_RULES = (
+        (10, 'pypdf2', False),
+        (200, 'pdfplumber', False),
+        (None, 'pdfplumber', True),
+    )
+    
+    # Levels every chunk shares; each chunk adds its own level after these
+    BASE_HIERARCHY = {'title': '27', 'chapter': '2'}
+    
     def __init__(self, pdf_path: str):
         self.pdf_path = pdf_path
         self.raw_text = ""
@@ -34,14 +98,42 @@ class HMCChunker:
         self.structure_map = {}
         self.cross_references = {}
         
-        # Regex patterns for identifying structure
+        # Regex patterns for identifying structure; headings are matched by
+        # _struct_re below
         self.patterns = {
-            'subchapter': re.compile(r'^SUBCHAPTER\s+(\d+|[IVX]+)\s*$', re.IGNORECASE),
-            'article': re.compile(r'^ARTICLE\s+(\d+|[A-Z]+)\s*$', re.IGNORECASE),
-            'section': re.compile(r'^§27–(\d{4})\s+(.+?)(?:\.|$)', re.IGNORECASE),
-            'cross_ref': re.compile(r'§?\s*27-(\d{4})', re.IGNORECASE),
-            'page_break': re.compile(r'\f|\n\s*\d+\s*\n'),
+            'cross_ref': re.compile(r'§?\s*27-(\d{4})'),
         }
+        
+        # Page markers and subchapter, article and section headings as one
+        # alternation over the whole text, matched case-sensitively since
+        # headings in the code are always uppercase. Each branch starts at a
+        # literal newline rather than ^, which lets the engine skip ahead to
+        # line starts; [^\S\n] keeps every branch on a single line; and a page
+        # marker line consumes the line, so it is never also read as a heading.
+        self._struct_re = re.compile(
+            r'\n(?:(?=[^\n]*--- PAGE)(?:(?=[^\n]*?PAGE (?P<page>\d+)))?[^\n]+'
+            r'|SUBCHAPTER[^\S\n]+(?P<sub>\d+|[IVX]+)[^\S\n]*$'
+            r'|ARTICLE[^\S\n]+(?P<art>\d+|[A-Z]+)[^\S\n]*$'
+            r'|§27–(?P<sec>\d{4})[^\S\n]+(?P<sec_title>.+?)(?:\.|$))',
+            re.MULTILINE
+        )
+        
+        # Just the section numbers of cross_ref mentions. Dropping the optional
+        # "§ " prefix leaves a literal to search for, and findall() returns the
+        # same numbers since the prefix never overlaps another mention.
+        self._section_ref_re = re.compile(r'27-(\d{4})')
+        
+        # Section body starting at a mention of the section number (see
+        # get_section_text). Stays case-insensitive: prose lines that wrap to
+        # start with "article" or "subchapter" end a section body too.
+        self._section_body_re = re.compile(
+            r'§?\s*27-\d{4}\s*[-–]?\s*(.+?)(?=\n\s*§?\s*27-\d{4}|\n\s*ARTICLE|\n\s*SUBCHAPTER|$)',
+            re.DOTALL | re.IGNORECASE
+        )
+        self._section_mentions = {}
+        self._section_mentions_text = None
+        self._section_spans = []
+        self._scanned_text = None
     
     def extract_text_basic(self) -> str:
         """
@@ -76,130 +168,227 @@ class HMCChunker:
         
         return sample_text
     
-    def extract_text_with_pypdf2(self) -> str:
-        """Extract text using PyPDF2 library"""
+    def extract_text_with_pypdf2(self, pdf_reader=None) -> str:
+        """Extract text using PyPDF2 library (pdf_reader: an already open PdfReader to reuse)"""
         try:
             import PyPDF2
-            text = ""
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
-                    text += f"\n--- PAGE {page_num + 1} ---\n{page_text}\n"
-            return text
+            if pdf_reader is None:
+                with open(self.pdf_path, 'rb') as file:
+                    return self._join_pypdf2_pages(PyPDF2.PdfReader(file))
+            return self._join_pypdf2_pages(pdf_reader)
         except ImportError:
             return self.extract_text_basic()
     
-    def extract_text_with_pdfplumber(self) -> str:
-        """Extract text using pdfplumber library (preferred for layout preservation)"""
+    def _join_pypdf2_pages(self, pdf_reader) -> str:
+        """Text of every page of a PyPDF2 reader, with page markers"""
+        parts = []
+        for page_num, page in enumerate(pdf_reader.pages):
+            page_text = page.extract_text()
+            parts.append(f"\n--- PAGE {page_num + 1} ---\n{page_text}\n")
+        return ''.join(parts)
+    
+    def extract_text_with_pdfplumber(self, parallel: Optional[bool] = None, pdf=None) -> str:
+        """
+        Extract text using pdfplumber library (preferred for layout preservation).
+        parallel forces the process pool on or off; by default EXTRACTION_RULES decides.
+        pdf is an already open pdfplumber document to reuse; the caller closes it.
+        """
         try:
             import pdfplumber
-            text = ""
-            with pdfplumber.open(self.pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += f"\n--- PAGE {page_num + 1} ---\n{page_text}\n"
-            return text
+            if pdf is None:
+                with pdfplumber.open(self.pdf_path) as pdf:
+                    return self._join_pdfplumber_pages(pdf, parallel)
+            return self._join_pdfplumber_pages(pdf, parallel)
         except ImportError:
             return self.extract_text_with_pypdf2()
     
+    def _join_pdfplumber_pages(self, pdf, parallel: Optional[bool]) -> str:
+        """Text of every non-empty page of a pdfplumber document, with page markers"""
+        num_pages = len(pdf.pages)
+        workers = max(1, (os.cpu_count() or 1) - 1)
+        if parallel is None:
+            _, parallel = self._pick_extraction(num_pages)
+        
+        if not parallel or workers < 2:
+            page_texts = [page.extract_text() for page in pdf.pages]
+        else:
+            # Workers open their own handle; pdf stays with this process
+            chunksize = 16 if num_pages > 500 else 8
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.pdf_path,)) as executor:
+                page_texts = [text for _, text in executor.map(_extract_one_page, range(num_pages), chunksize=chunksize)]
+        
+        parts = [f"\n--- PAGE {page_num + 1} ---\n{page_text}\n"
+                 for page_num, page_text in enumerate(page_texts) if page_text]
+        return ''.join(parts)
+    
+    def _pick_extraction(self, num_pages: int) -> Tuple[str, bool]:
+        """Method and pool setting of the first EXTRACTION_RULES entry that fits num_pages"""
+        for max_pages, method, parallel in self.EXTRACTION_RULES:
+            if max_pages is None or num_pages <= max_pages:
+                return method, parallel
+        return 'pdfplumber', True
+    
+    def extract_text_smart(self) -> str:
+        """
+        Pick the extraction method for the document's page count (see EXTRACTION_RULES).
+        The document opened to count pages is handed on to the chosen method
+        rather than parsed a second time.
+        """
+        try:
+            import PyPDF2
+        except ImportError:
+            PyPDF2 = None
+        try:
+            import pdfplumber
+        except ImportError:
+            pdfplumber = None
+        
+        if pdfplumber is not None:
+            with pdfplumber.open(self.pdf_path) as pdf:
+                method, parallel = self._pick_extraction(len(pdf.pages))
+                if method != 'pypdf2' or PyPDF2 is None:
+                    return self.extract_text_with_pdfplumber(parallel=parallel, pdf=pdf)
+            return self.extract_text_with_pypdf2()
+        
+        if PyPDF2 is not None:
+            # Only PyPDF2 is available, whatever the page count
+            with open(self.pdf_path, 'rb') as file:
+                return self.extract_text_with_pypdf2(PyPDF2.PdfReader(file))
+        
+        return self.extract_text_basic()
+    
     def extract_text(self) -> str:
         """Main text extraction method - tries best available option"""
-        return self.extract_text_with_pdfplumber()
+        return self.extract_text_smart()
     
     def identify_structure(self, text: str) -> Dict[str, List[Dict]]:
         """Identify the hierarchical structure of the document"""
+        return self._scan(text)
+    
+    def _scan(self, text: str) -> Dict[str, List[Dict]]:
+        """
+        Single finditer pass over the document. Builds the structure map, with
+        each subchapter and article's character offset as 'start' for
+        create_chunks to slice at, and records the character span of every
+        section heading, which extract_cross_references slices instead of
+        re-scanning the text.
+        """
         structure = {
             'subchapters': [],
             'articles': [],
             'sections': []
         }
+        section_starts = []
         
-        lines = text.split('\n')
         current_page = 1
+        line_number = 0
+        last_pos = 0
         
-        for i, line in enumerate(lines):
+        # The leading newline lets the first line match too; a match starting
+        # at padded[i] is the line starting at text[i]. This stays a str scan:
+        # the recorded offsets slice text directly, and matching a UTF-8 bytes
+        # copy measured no faster.
+        padded = '\n' + text
+        for match in self._struct_re.finditer(padded):
+            # Which branch matched: 'sub', 'art', 'sec_title' (the last group
+            # of a section heading), or 'page'/None for a page marker line
+            branch = match.lastgroup
+            
             # Track page numbers
-            if '--- PAGE' in line:
-                try:
-                    current_page = int(re.search(r'PAGE (\d+)', line).group(1))
-                except:
-                    pass
+            if branch is None or branch == 'page':
+                if branch:
+                    current_page = int(match.group('page'))
                 continue
             
-            # Find subchapters
-            subchapter_match = self.patterns['subchapter'].search(line)
-            if subchapter_match:
-                # Title is on the next line
-                title = ""
-                if i + 1 < len(lines):
-                    title = lines[i + 1].strip()
-                structure['subchapters'].append({
-                    'number': subchapter_match.group(1),
-                    'title': title,
-                    'line_number': i,
-                    'page': current_page
-                })
-            
-            # Find articles
-            article_match = self.patterns['article'].search(line)
-            if article_match:
-                # Title is on the next line
-                title = ""
-                if i + 1 < len(lines):
-                    title = lines[i + 1].strip()
-                structure['articles'].append({
-                    'number': article_match.group(1),
-                    'title': title,
-                    'line_number': i,
-                    'page': current_page
-                })
+            line_start = match.start()
+            line_number += text.count('\n', last_pos, line_start)
+            last_pos = line_start
             
-            # Find sections
-            section_match = self.patterns['section'].search(line)
-            if section_match:
+            if branch == 'sec_title':
+                section_num = match.group('sec')
                 structure['sections'].append({
-                    'number': section_match.group(1),
-                    'title': section_match.group(2).strip() if len(section_match.groups()) > 1 and section_match.group(2) else "",
-                    'line_number': i,
+                    'number': section_num,
+                    'title': match.group('sec_title').strip(),
+                    'line_number': line_number,
                     'page': current_page
                 })
+                section_starts.append((section_num, line_start))
+                continue
+            
+            # Subchapter and article titles are on the next line (empty past the end)
+            line_end = match.end() - 1
+            next_end = text.find('\n', line_end + 1)
+            if next_end == -1:
+                next_end = len(text)
+            kind = 'subchapters' if branch == 'sub' else 'articles'
+            structure[kind].append({
+                'number': match.group(branch),
+                'title': text[line_end + 1:next_end].strip(),
+                'line_number': line_number,
+                'page': current_page,
+                'start': line_start
+            })
+        
+        # Each section runs to the next heading. Kept as a list because a
+        # section number can appear under more than one heading.
+        ends = [start for _, start in section_starts[1:]] + [len(text)]
+        self._section_spans = [(num, start, end) for (num, start), end in zip(section_starts, ends)]
+        self._scanned_text = text
         
         return structure
     
     def extract_cross_references(self, text: str) -> Dict[str, List[str]]:
         """Extract cross-references between sections"""
         references = {}
-        sections = self.patterns['section'].findall(text)
         
-        for section_num, _ in sections:
-            section_text = self.get_section_text(text, section_num)
-            refs = self.patterns['cross_ref'].findall(section_text)
-            # Remove self-references
-            refs = [ref for ref in refs if ref != section_num]
+        # Section spans come from the structure scan
+        if text is not self._scanned_text:
+            self._scan(text)
+        
+        for section_num, start, end in self._section_spans:
+            section_text = text[start:end]
+            # Remove self-references; dedupe in order of first mention
+            refs = list(dict.fromkeys(ref for ref in self._section_ref_re.findall(section_text) if ref != section_num))
             if refs:
-                references[section_num] = list(set(refs))
+                references[section_num] = refs
         
         return references
     
     def get_section_text(self, text: str, section_num: str) -> str:
         """Extract the full text of a specific section"""
-        pattern = re.compile(
-            rf'§?\s*27-{section_num}\s*[-–]?\s*(.+?)(?=\n\s*§?\s*27-\d{{4}}|\n\s*ARTICLE|\n\s*SUBCHAPTER|$)',
-            re.DOTALL | re.IGNORECASE
-        )
-        match = pattern.search(text)
+        # Index the first mention of every section number in one pass per text;
+        # finditer starts each match where a per-section search would
+        if text is not self._section_mentions_text:
+            self._section_mentions = {}
+            for match in self.patterns['cross_ref'].finditer(text):
+                self._section_mentions.setdefault(match.group(1), match.start())
+            self._section_mentions_text = text
+        
+        start = self._section_mentions.get(section_num)
+        if start is None:
+            return ""
+        match = self._section_body_re.match(text, start)
         return match.group(0) if match else ""
     
-    def estimate_tokens(self, text: str) -> int:
-        """Rough token estimation (1 token ≈ 4 characters for English)"""
-        return len(text) // 4
+    def _heading_text(self, text: str, headings: List[Dict], i: int) -> str:
+        """Text from the i-th heading's 'start' offset up to the line before the next heading"""
+        if i + 1 < len(headings):
+            # Drop the newline ending the last line, as joining the lines would
+            return text[headings[i]['start']:headings[i + 1]['start'] - 1]
+        return text[headings[i]['start']:]
     
     def create_chunks(self, text: str, structure: Dict) -> List[ChunkMetadata]:
-        """Create chunks based on the identified structure"""
+        """
+        Create chunks based on the identified structure.
+        Token estimates are rough: 1 token ≈ 4 characters for English.
+        """
         chunks = []
-        lines = text.split('\n')
+        
+        # Articles and subchapters overlap, so lowercase the document once and
+        # slice it alongside the text, as long as lower() kept every offset
+        doc_lower = text.lower()
+        if len(doc_lower) != len(text):
+            doc_lower = None
         
         # Create section-level chunks (most granular)
         for section in structure['sections']:
@@ -209,98 +398,84 @@ class HMCChunker:
             if section_text.strip():
                 # Extract keywords from title and content
                 keywords = self.extract_keywords(section['title'] + " " + section_text)
+                section_ref = f"27-{section_num}"
                 
                 chunk = ChunkMetadata(
                     chunk_id=f"section_27_{section_num}",
-                    title=f"§ 27-{section_num} - {section['title']}",
-                    hierarchy={
-                        'title': '27',
-                        'chapter': '2',
-                        'section': f"27-{section_num}"
-                    },
+                    title=f"§ {section_ref} - {section['title']}",
+                    hierarchy={**self.BASE_HIERARCHY, 'section': section_ref},
                     page_numbers=[section['page']],
                     cross_references=self.cross_references.get(section_num, []),
                     keywords=keywords,
                     chunk_type='section',
                     parent_chunks=[],
                     content_length=len(section_text),
-                    token_estimate=self.estimate_tokens(section_text)
+                    token_estimate=len(section_text) // 4
                 )
                 chunks.append(chunk)
         
         # Create article-level chunks (medium granularity)
-        for i, article in enumerate(structure['articles']):
-            start_line = article['line_number']
-            end_line = structure['articles'][i + 1]['line_number'] if i + 1 < len(structure['articles']) else len(lines)
-            
-            article_text = '\n'.join(lines[start_line:end_line])
-            keywords = self.extract_keywords(article['title'] + " " + article_text)
+        articles = structure['articles']
+        for i, article in enumerate(articles):
+            article_text = self._heading_text(text, articles, i)
+            article_lower = None
+            if doc_lower is not None:
+                article_lower = article['title'].lower() + " " + self._heading_text(doc_lower, articles, i)
+            keywords = self.extract_keywords(article['title'] + " " + article_text, article_lower)
             
             chunk = ChunkMetadata(
                 chunk_id=f"article_{article['number']}",
                 title=f"Article {article['number']} - {article['title']}",
-                hierarchy={
-                    'title': '27',
-                    'chapter': '2',
-                    'article': article['number']
-                },
+                hierarchy={**self.BASE_HIERARCHY, 'article': article['number']},
                 page_numbers=[article['page']],
                 cross_references=[],
                 keywords=keywords,
                 chunk_type='article',
                 parent_chunks=[],
                 content_length=len(article_text),
-                token_estimate=self.estimate_tokens(article_text)
+                token_estimate=len(article_text) // 4
             )
             chunks.append(chunk)
         
         # Create subchapter-level chunks (highest level)
-        for i, subchapter in enumerate(structure['subchapters']):
-            start_line = subchapter['line_number']
-            end_line = structure['subchapters'][i + 1]['line_number'] if i + 1 < len(structure['subchapters']) else len(lines)
-            
-            subchapter_text = '\n'.join(lines[start_line:end_line])
-            keywords = self.extract_keywords(subchapter['title'] + " " + subchapter_text)
+        subchapters = structure['subchapters']
+        for i, subchapter in enumerate(subchapters):
+            subchapter_text = self._heading_text(text, subchapters, i)
+            subchapter_lower = None
+            if doc_lower is not None:
+                subchapter_lower = subchapter['title'].lower() + " " + self._heading_text(doc_lower, subchapters, i)
+            keywords = self.extract_keywords(subchapter['title'] + " " + subchapter_text, subchapter_lower)
             
             chunk = ChunkMetadata(
                 chunk_id=f"subchapter_{subchapter['number']}",
                 title=f"Subchapter {subchapter['number']} - {subchapter['title']}",
-                hierarchy={
-                    'title': '27',
-                    'chapter': '2',
-                    'subchapter': subchapter['number']
-                },
+                hierarchy={**self.BASE_HIERARCHY, 'subchapter': subchapter['number']},
                 page_numbers=[subchapter['page']],
                 cross_references=[],
                 keywords=keywords,
                 chunk_type='subchapter',
                 parent_chunks=[],
                 content_length=len(subchapter_text),
-                token_estimate=self.estimate_tokens(subchapter_text)
+                token_estimate=len(subchapter_text) // 4
             )
             chunks.append(chunk)
         
         return chunks
     
-    def extract_keywords(self, text: str) -> List[str]:
-        """Extract key terms and concepts from text"""
-        # Common HMC terms and concepts
-        hmc_terms = [
-            'dwelling', 'owner', 'tenant', 'occupant', 'building', 'premises',
-            'violation', 'inspection', 'maintenance', 'repair', 'habitability',
-            'safety', 'health', 'sanitary', 'ventilation', 'heat', 'hot water',
-            'pest', 'rodent', 'lead', 'mold', 'fire', 'emergency', 'access',
-            'common area', 'apartment', 'room', 'bathroom', 'kitchen'
-        ]
-        
-        text_lower = text.lower()
-        found_keywords = [term for term in hmc_terms if term in text_lower]
+    def extract_keywords(self, text: str, text_lower: Optional[str] = None) -> List[str]:
+        """Extract key terms and concepts from text (text_lower: text.lower(), if already at hand)"""
+        # Each `in` test stops at the term's first occurrence, which beats a
+        # multi-pattern automaton that has to report every occurrence
+        if text_lower is None:
+            text_lower = text.lower()
+        found_keywords = [term for term in self.HMC_TERMS if term in text_lower]
         
         # Add any section numbers mentioned
-        section_refs = self.patterns['cross_ref'].findall(text)
+        section_refs = self._section_ref_re.findall(text)
         found_keywords.extend([f"section-27-{ref}" for ref in section_refs])
         
-        return list(set(found_keywords))
+        # Sorted so the same chunk always serializes the same way
+        return sorted(set(found_keywords))
     
     def add_context_overlap(self, chunks: List[ChunkMetadata], overlap_tokens: int = 150) -> List[ChunkMetadata]:
         """Add overlapping context between adjacent chunks"""
@@ -325,16 +500,22 @@ class HMCChunker:
         print("🎯 Adding context overlap...")
         self.chunks = self.add_context_overlap(self.chunks)
         
+        type_counts = Counter()
+        total_tokens = 0
+        for chunk in self.chunks:
+            type_counts[chunk.chunk_type] += 1
+            total_tokens += chunk.token_estimate
+        
         return {
-            'chunks': [asdict(chunk) for chunk in self.chunks],
+            'chunks': [chunk.to_dict() for chunk in self.chunks],
             'structure': structure,
             'cross_references': self.cross_references,
             'stats': {
                 'total_chunks': len(self.chunks),
-                'subchapters': len([c for c in self.chunks if c.chunk_type == 'subchapter']),
-                'articles': len([c for c in self.chunks if c.chunk_type == 'article']),
-                'sections': len([c for c in self.chunks if c.chunk_type == 'section']),
-                'total_tokens': sum(c.token_estimate for c in self.chunks)
+                'subchapters': type_counts['subchapter'],
+                'articles': type_counts['article'],
+                'sections': type_counts['section'],
+                'total_tokens': total_tokens
             }
         }
     
@@ -348,18 +529,11 @@ class HMCChunker:
         
         # Save chunks by type
         for chunk in self.chunks:
-            chunk_dict = asdict(chunk)
-            filename = f"{output_dir}/{chunk.chunk_type}s/{chunk.chunk_id}.json"
-            
-            with open(filename, 'w') as f:
-                json.dump(chunk_dict, f, indent=2)
+            _dump(chunk.to_dict(), f"{output_dir}/{chunk.chunk_type}s/{chunk.chunk_id}.json")
         
         # Save metadata
-        with open(f"{output_dir}/metadata/cross_references.json", 'w') as f:
-            json.dump(self.cross_references, f, indent=2)
-        
-        with open(f"{output_dir}/metadata/structure_map.json", 'w') as f:
-            json.dump(self.structure_map, f, indent=2)
+        _dump(self.cross_references, f"{output_dir}/metadata/cross_references.json")
+        _dump(self.structure_map, f"{output_dir}/metadata/structure_map.json")
         
         print(f"✅ Chunks saved to {output_dir}/")
 